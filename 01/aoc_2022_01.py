@@ -5,36 +5,205 @@
 Solves first day of aoc 2022.
 """
 
-from functools import reduce
-import operator
-from typing import List
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
+import heapq
+import math
+import mmap
+import os
+from typing import Final, Iterable, Iterator, List, Optional, Tuple
 
 
-def load_input(filename: str) -> List[List[int]]:
-    """Loads and parses elves and their cargo"""
+TEST_DATA: Final = """1000
+2000
+3000
+
+4000
+
+5000
+6000
+
+7000
+8000
+9000
+
+10000
+"""
+
+
+def elf_totals(lines: Iterable[str]) -> Iterator[int]:
+    """Streams cargo line by line, yields the total of every elf"""
+    total = None
+    for line in lines:
+        line = line.strip()
+        if line:
+            total = int(line) + (total or 0)
+        elif total is not None:
+            yield total
+            total = None
+    if total is not None:
+        yield total
+
+
+def top_k(totals: Iterable[int], k: int) -> List[int]:
+    """Returns k largest totals in descending order, keeping a heap of size k"""
+    heap: List[int] = []
+    if k <= 0:
+        return heap
+
+    for total in totals:
+        if len(heap) < k:
+            heapq.heappush(heap, total)
+        elif total > heap[0]:
+            heapq.heapreplace(heap, total)
+
+    return sorted(heap, reverse=True)
+
+
+def split_ranges(filename: str, parts: int) -> List[Tuple[int, int]]:
+    """Splits file into about equally sized byte ranges, each ending right
+    after a blank line (LF or CRLF), so no elf's group is ever cut in two"""
+    size = os.path.getsize(filename)
+    if size == 0:
+        return []
+
+    boundaries = [0]
+    with open(filename, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        for i in range(1, parts):
+            pos = max(size * i // parts, boundaries[-1])
+            found = [idx + len(sep) for sep in (b'\n\n', b'\n\r\n')
+                     if (idx := mapped.find(sep, pos)) != -1]
+            if not found:
+                break
+            if min(found) < size:
+                boundaries.append(min(found))
+
+    boundaries.append(size)
+    return list(zip(boundaries, boundaries[1:]))
+
+
+def reduce_range(filename: str, start: int, end: int, k: int) -> List[int]:
+    """Reduces byte range of file to its local top k, streaming it line by line"""
+    with open(filename, 'rb') as file:
+        file.seek(start)
+        return top_k(elf_totals(range_lines(file, end)), k)
+
+
+def range_lines(file, end: int) -> Iterator[bytes]:
+    """Yields lines of a binary file from its current position up to end"""
+    while file.tell() < end:
+        line = file.readline()
+        if not line:
+            break
+        yield line
+
+
+def parallel_top_k(filename: str, k: int, workers: Optional[int] = None) -> List[int]:
+    """Reduces byte ranges in separate processes, then merges the partial top k"""
+    workers = workers or os.cpu_count() or 1
+    ranges = split_ranges(filename, workers)
+
+    with ProcessPoolExecutor(workers) as pool:
+        partials = pool.map(reduce_range,
+                            [filename] * len(ranges),
+                            [start for start, _ in ranges],
+                            [end for _, end in ranges],
+                            [k] * len(ranges))
+        return top_k(chain.from_iterable(partials), k)
+
+
+class CalorieSummary:
+    """Per-elf totals, computed once and kept in a compact array"""
+
+    def __init__(self, totals: Iterable[int]):
+        self.totals = array('q', totals)
+        self._sorted = None
+
+    def max(self) -> int:
+        """Heaviest cargo"""
+        return max(self.totals)
+
+    def top(self, k: int) -> List[int]:
+        """k heaviest cargos in descending order"""
+        return top_k(self.totals, k)
+
+    def total(self) -> int:
+        """Cargo of all elves"""
+        return sum(self.totals)
+
+    def percentile(self, percent: float) -> int:
+        """Nearest-rank percentile of the elves' cargo"""
+        if self._sorted is None:
+            self._sorted = array('q', sorted(self.totals))
+        rank = max(1, math.ceil(percent / 100 * len(self._sorted)))
+        return self._sorted[rank - 1]
+
+
+def load_input(filename: str) -> CalorieSummary:
+    """Loads and sums up elves and their cargo"""
     with open(filename, 'rt', encoding='utf-8') as file:
-        return list(
-            map(lambda x: list(map(int, x.rstrip().split('\n'))),
-                file.read().split('\n\n'))
-                )
+        return CalorieSummary(elf_totals(file))
 
 
-def part_01(elves: List[List[int]]) -> None:
+def part_01(summary: CalorieSummary) -> int:
     """Heaviest cargo"""
-    print(reduce(max, map(sum, elves)))
+    return summary.max()
 
 
-def part_02(elves: List[List[int]]) -> None:
+def part_02(summary: CalorieSummary) -> int:
     """Three most heavy cargos"""
-    print(reduce(operator.add, sorted(map(sum, elves))[-3:]))
+    return sum(summary.top(3))
+
+
+def test_top_k():
+    """Tests streaming aggregation"""
+    totals = list(elf_totals(TEST_DATA.splitlines()))
+    assert [6000, 4000, 11000, 24000, 10000] == totals
+    assert [24000, 11000, 10000] == top_k(totals, 3)
+    assert sorted(totals, reverse=True) == top_k(totals, 9)
+    assert [] == top_k(totals, 0)
+
+
+def test_summary():
+    """Tests both parts and summary statistics"""
+    summary = CalorieSummary(elf_totals(TEST_DATA.splitlines()))
+    assert 24000 == part_01(summary)
+    assert 45000 == part_02(summary)
+    assert 55000 == summary.total()
+    assert 10000 == summary.percentile(50)
+    assert 24000 == summary.percentile(100)
+    assert 4000 == summary.percentile(0)
+
+
+def test_parallel_top_k(tmp_path):
+    """Tests splitting and parallel reduction"""
+    data = '\n'.join([TEST_DATA] * 3)
+    filename = tmp_path / 'input'
+    filename.write_text(data)
+
+    for parts in range(1, 8):
+        ranges = split_ranges(str(filename), parts)
+        assert 0 == ranges[0][0] and len(data) == ranges[-1][1]
+        assert all(data[start - 2:start] == '\n\n' for start, _ in ranges[1:])
+        totals = chain.from_iterable(reduce_range(str(filename), start, end, 20)
+                                     for start, end in ranges)
+        assert sorted(totals) == sorted(elf_totals(data.splitlines()))
+
+    assert [24000, 24000, 24000, 11000] == parallel_top_k(str(filename), 4, workers=2)
+
+    filename.write_bytes(data.replace('\n', '\r\n').encode())
+    assert 3 == len(split_ranges(str(filename), 3))
+    assert [24000, 24000, 24000, 11000] == parallel_top_k(str(filename), 4, workers=3)
 
 
 def main() -> None:
     """Main wrapper."""
-    elves = load_input('./input')
+    summary = load_input('./input')
 
-    part_01(elves)
-    part_02(elves)
+    print(part_01(summary))
+    print(part_02(summary))
 
 
 if __name__ == "__main__":
@@ -9,10 +9,17 @@ amount of possible values is limited.
 
 """
 
-from typing import Final
+from typing import Final, Tuple
 from functools import reduce
 import operator
 
+import pytest
+
+try:
+    import numpy as np
+except ImportError:  # numpy path is optional
+    np = None
+
 SCORES: Final = {
     ('A', 'X'): (4, 3),
     ('A', 'Y'): (8, 4),
@@ -25,11 +32,8 @@ SCORES: Final = {
     ('C', 'Z'): (6, 7)
 }
 
-
-def load_input(filename: str):
-    """Loads input"""
-    with open(filename, 'rt', encoding='utf-8') as file:
-        return [tuple(line.rstrip().split()) for line in file.readlines()]
+RECORDS: Final = tuple(f'{a} {x}'.encode() for a in 'ABC' for x in 'XYZ')
+TABLE: Final = tuple(SCORES[(a, x)] for a in 'ABC' for x in 'XYZ')
 
 
 def part_01(games) -> int:
@@ -42,6 +46,56 @@ def part_02(games) -> int:
     return reduce(operator.add, map(lambda x: SCORES[x][1], games))
 
 
+def score_bytes(data: bytes) -> Tuple[int, int]:
+    """Scores both parts straight from raw input, one bytes.count per
+    combination, no per line objects. Fails unless every line is a record"""
+    counts = [data.count(record) for record in RECORDS]
+
+    stripped = data.rstrip()
+    lines = stripped.count(b'\n') + 1 if stripped else 0
+    if sum(counts) != lines or len(stripped) - stripped.count(b'\r\n') != max(4 * lines - 1, 0):
+        raise ValueError('input must consist of "A X" records, one per line')
+
+    return (sum(count * score[0] for count, score in zip(counts, TABLE)),
+            sum(count * score[1] for count, score in zip(counts, TABLE)))
+
+
+def score_numpy(data: bytes) -> Tuple[int, int]:
+    """Scores both parts with numpy: opponent and response columns are
+    strided views of the raw buffer, rounds are counted per combination
+    and weighted with the 3x3 score table. CRLF input is converted first"""
+    if np is None:
+        raise ImportError('score_numpy requires numpy')
+
+    if b'\r' in data:
+        data = data.replace(b'\r\n', b'\n')
+    end = len(data)
+    while end and data[end - 1] == ord('\n'):
+        end -= 1
+    if (end + 1) % 4:
+        raise ValueError('input must consist of 4 byte "A X" records')
+
+    raw = np.frombuffer(data, dtype=np.uint8, count=end)
+    opponent, response = raw[0::4], raw[2::4]
+    if (np.any(raw[1::4] != ord(' ')) or np.any(raw[3::4] != ord('\n'))
+            or np.any((opponent < ord('A')) | (opponent > ord('C')))
+            or np.any((response < ord('X')) | (response > ord('Z')))):
+        raise ValueError('input must consist of 4 byte "A X" records')
+
+    index = (opponent - ord('A')) * 3 + (response - ord('X'))
+    counts = np.bincount(index, minlength=9).astype(np.int64)
+    scores = np.array(TABLE, dtype=np.int64)
+
+    part_1, part_2 = counts @ scores
+    return int(part_1), int(part_2)
+
+
+def load_bytes(filename: str) -> bytes:
+    """Loads raw input"""
+    with open(filename, 'rb') as file:
+        return file.read()
+
+
 def test_part_01():
     """Tests part 01"""
     games = [('A', 'Y'), ('B', 'X'), ('C', 'Z')]
@@ -56,12 +110,34 @@ def test_part_02():
     assert 12 == part_02(games)
 
 
+def test_score_bytes():
+    """Tests table driven bytes scorer"""
+    assert (15, 12) == score_bytes(b'A Y\nB X\nC Z\n')
+    assert (15, 12) == score_bytes(b'A Y\nB X\nC Z')
+    assert (15, 12) == score_bytes(b'A Y\r\nB X\r\nC Z\r\n')
+    assert (0, 0) == score_bytes(b'')
+    for broken in (b'A Y\nB W\nC Z\n', b'garbage', b'A Y\n\nB X\n', b'A YB X\n'):
+        with pytest.raises(ValueError):
+            score_bytes(broken)
+
+
+def test_score_numpy():
+    """Tests numpy scorer"""
+    pytest.importorskip('numpy')
+    assert (15, 12) == score_numpy(b'A Y\nB X\nC Z\n')
+    assert (15, 12) == score_numpy(b'A Y\nB X\nC Z')
+    assert (15, 12) == score_numpy(b'A Y\r\nB X\r\nC Z\r\n\r\n')
+    for broken in (b'A Y\n\nB X\nC Z\n', b'A Y\nB W\nC Z\n', b'A Y\nB X\nC'):
+        with pytest.raises(ValueError):
+            score_numpy(broken)
+
+
 def main() -> None:
     """Main wrapper."""
-    games = load_input('./input')
+    score_01, score_02 = score_bytes(load_bytes('./input'))
 
-    print(part_01(games))
-    print(part_02(games))
+    print(score_01)
+    print(score_02)
 
 
 if __name__ == "__main__":
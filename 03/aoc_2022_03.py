@@ -5,11 +5,13 @@
 Solves third day of aoc 2022.
 """
 
-from typing import List, Final
-import re
+from typing import Final, Iterable, Iterator, List
+import string
 from functools import reduce
 import operator
 
+import pytest
+
 
 TEST_INPUT: Final = [
     'vJrwpWtwJgWrhcsFMMfFFhFp',
@@ -20,6 +22,10 @@ TEST_INPUT: Final = [
     'CrZsJsPPZsGzwwsLwLmpwMDw'
 ]
 
+ITEMS: Final = string.ascii_lowercase + string.ascii_uppercase
+
+PRIORITIES: Final = bytes(ITEMS.find(chr(i)) + 1 for i in range(256))
+
 
 def load_rucksacks(filename: str) -> List[str]:
     """Load elves cargo"""
@@ -27,31 +33,84 @@ def load_rucksacks(filename: str) -> List[str]:
         return [line.rstrip() for line in file.readlines()]
 
 
+def read_rucksacks(filename: str) -> Iterator[str]:
+    """Streams elves cargo line by line"""
+    with open(filename, 'rt', encoding='utf-8') as file:
+        for line in file:
+            yield line.rstrip()
+
+
 def priority(char: str):
-    """Returns priority of char"""
-    return 1 + ord(char) - ord('a') if re.match('[a-z]', char)\
-        else 26 + 1 + ord(char) - ord('A')
+    """Returns priority of char, 0 for non items"""
+    return PRIORITIES[ord(char)]
+
+
+def item_mask(items: str) -> int:
+    """Returns items as bit mask, bit index is the item's priority"""
+    return reduce(operator.or_, map(lambda x: 1 << PRIORITIES[x], items.encode()), 0)
+
+
+def mask_priority(mask: int) -> int:
+    """Highest priority of items in mask, fails if there is no item"""
+    if mask >> 1 == 0:
+        raise ValueError('no common item')
+    return mask.bit_length() - 1
+
+
+def common_priority(bag: str) -> int:
+    """Priority of item in both compartments, highest one if several"""
+    half = len(bag) // 2
+    return mask_priority(item_mask(bag[:half]) & item_mask(bag[half:]))
+
+
+def badge_priority(group: List[str]) -> int:
+    """Priority of item carried by all elves of group"""
+    return mask_priority(reduce(operator.and_, map(item_mask, group)))
+
+
+def group_masks(bags: Iterable[str], size: int) -> Iterator[int]:
+    """Folds item masks over consecutive groups of given size, yields the
+    mask of items common to every group member"""
+    mask, members = -1, 0
+    for bag in bags:
+        mask &= item_mask(bag)
+        members += 1
+        if members == size:
+            yield mask
+            mask, members = -1, 0
+
+    if members:
+        raise ValueError(f'last group has {members} of {size} members')
+
+
+def mask_items(mask: int) -> str:
+    """Returns all items of mask, ordered by priority"""
+    return ''.join(item for i, item in enumerate(ITEMS, 1) if mask >> i & 1)
+
+
+def group_items(bags: Iterable[str], size: int) -> Iterator[str]:
+    """Yields every item common to each group of given size, in one pass"""
+    return map(mask_items, group_masks(bags, size))
 
 
 def badge(item: List[str]) -> str:
     """Returns badge of group of elves"""
-    return list(set(filter(lambda x: x in item[1] and x in item[2], item[0])))[0]
+    return ITEMS[badge_priority(item) - 1]
 
 
 def common(bag: str) -> str:
     """Find common char in bag"""
-    return list(set(filter(lambda x: x in bag[:len(bag)//2], bag[len(bag)//2:])))[0]
+    return ITEMS[common_priority(bag) - 1]
 
 
 def part_01(bags: List[str]) -> int:
     """Looks up first part of score tuple"""
-    return reduce(operator.add, map(priority, map(common, bags)))
+    return reduce(operator.add, map(common_priority, bags))
 
 
-def part_02(bags: List[str]) -> int:
-    """Split rucksacks into badges of three and get priotity of common char"""
-    return reduce(operator.add,
-                  map(priority, map(badge, [bags[i:i+3] for i in range(0, len(bags), 3)])))
+def part_02(bags: Iterable[str], size: int = 3) -> int:
+    """Split rucksacks into groups and get priotity of common char"""
+    return reduce(operator.add, map(mask_priority, group_masks(bags, size)))
 
 
 def test_part_01():
@@ -64,12 +123,46 @@ def test_part_02():
     assert 70 == part_02(TEST_INPUT)
 
 
+def test_masks():
+    """Tests bit mask helpers"""
+    assert 0b1110 == item_mask('cabba')
+    assert 'p' == common(TEST_INPUT[0])
+    assert 'L' == common(TEST_INPUT[1])
+    assert 'r' == badge(TEST_INPUT[:3])
+    assert 52 == badge_priority(['Zz', 'Z'])
+    for call, arg in ((common, 'abcd'), (part_01, ['abcd']), (badge, ['ab', 'cd', 'ef'])):
+        with pytest.raises(ValueError):
+            call(arg)
+
+
+def test_group_items():
+    """Tests groups of arbitrary size"""
+    assert ['r', 'Z'] == list(group_items(iter(TEST_INPUT), 3))
+    assert ['frsFM', 'qvwBT', 'GJZ'] == list(group_items(TEST_INPUT, 2))
+    assert 70 == part_02(iter(TEST_INPUT))
+    with pytest.raises(ValueError):
+        part_02(TEST_INPUT, 6)
+
+
+def test_read_rucksacks(tmp_path):
+    """Tests lazy reading feeds the group engine"""
+    filename = tmp_path / 'input'
+    filename.write_text('\n'.join(TEST_INPUT) + '\n')
+
+    assert TEST_INPUT == list(read_rucksacks(str(filename)))
+    assert 70 == part_02(read_rucksacks(str(filename)))
+
+
+def test_priority():
+    """Tests priority lookup table"""
+    assert [1, 26, 27, 52] == list(map(priority, 'azAZ'))
+    assert 0 == priority('\n')
+
+
 def main() -> None:
     """Main wrapper."""
-    bags = load_rucksacks('./input')
-
-    print(part_01(bags))
-    print(part_02(bags))
+    print(part_01(load_rucksacks('./input')))
+    print(part_02(read_rucksacks('./input')))
 
 
 if __name__ == "__main__":
@@ -4,9 +4,11 @@
 """
 Solves fourth day of aoc 2022.
 
-Treats elf assignment as set initialized from range.
+Treats elf assignment as closed interval of section ids.
 """
 
+from bisect import bisect_right
+from itertools import accumulate
 from typing import Final, Tuple, List, Set
 from functools import reduce
 import operator
@@ -34,19 +36,70 @@ def load_data(filename: str) -> List[Tuple[Tuple[int, int], Tuple[int, int]]]:
         return list(map(split_elf, map(lambda x: x.rstrip().split(','), file.readlines())))
 
 
-def elf_set(elf: Tuple[int, int]) -> Set[int]:
-    """Returns elves assignment as a set of ints"""
-    return set(range(elf[0], elf[1] + 1))
-
-
 def is_contained(left: Tuple[int, int], right: Tuple[int, int]) -> bool:
     """True if ones assignment is completely contained in the others"""
-    return elf_set(left).issubset(elf_set(right)) or elf_set(right).issubset(elf_set(left))
+    return (right[0] <= left[0] and left[1] <= right[1]) \
+        or (left[0] <= right[0] and right[1] <= left[1])
 
 
 def overlaps(left: Tuple[int, int], right: Tuple[int, int]) -> bool:
     """True is two elves assignments have something in common"""
-    return len(elf_set(left).intersection(elf_set(right))) > 0
+    return left[0] <= right[1] and right[0] <= left[1]
+
+
+class IntervalIndex:
+    """Sweep line index over all assignments, not only the given pairs"""
+
+    def __init__(self, assignments: List[Tuple[int, int]]):
+        self.assignments = list(assignments)
+
+        events = sorted([(start, 1) for start, _ in self.assignments]
+                        + [(end + 1, -1) for _, end in self.assignments])
+        self.bounds: List[int] = []
+        self.counts: List[int] = []
+        for position, count in zip(map(lambda x: x[0], events),
+                                   accumulate(map(lambda x: x[1], events))):
+            if self.bounds and self.bounds[-1] == position:
+                self.counts[-1] = count
+            else:
+                self.bounds.append(position)
+                self.counts.append(count)
+
+    @classmethod
+    def from_pairs(cls, data: List[Tuple[Tuple[int, int], Tuple[int, int]]]):
+        """Builds index over both elves of every pair"""
+        return cls([elf for pair in data for elf in pair])
+
+    def overlapping(self) -> Set[int]:
+        """Indices of assignments overlapping any other assignment. Sorted by
+        start, an assignment overlaps a predecessor if it starts before the
+        largest end seen so far, and a successor if it ends after the next start"""
+        order = sorted(range(len(self.assignments)), key=lambda i: self.assignments[i])
+        found = set()
+        max_end = None
+        for pos, i in enumerate(order):
+            start, end = self.assignments[i]
+            if max_end is not None and start <= max_end:
+                found.add(i)
+            if pos + 1 < len(order) and self.assignments[order[pos + 1]][0] <= end:
+                found.add(i)
+            max_end = end if max_end is None else max(max_end, end)
+        return found
+
+    def coverage(self) -> List[Tuple[int, int, int]]:
+        """Run length encoded coverage as (first, last, count) section ranges"""
+        return [(first, nxt - 1, count)
+                for first, nxt, count in zip(self.bounds, self.bounds[1:], self.counts)
+                if count]
+
+    def coverage_at(self, section: int) -> int:
+        """Number of assignments covering given section"""
+        idx = bisect_right(self.bounds, section) - 1
+        return self.counts[idx] if idx >= 0 else 0
+
+    def max_coverage(self) -> int:
+        """Maximum number of assignments covering a single section"""
+        return max(self.counts, default=0)
 
 
 def part_01(data: List[Tuple[Tuple[int, int], Tuple[int, int]]]) -> int:
@@ -69,6 +122,28 @@ def test_part_02():
     assert 4 == part_02(TEST_DATA)
 
 
+def test_intervals():
+    """Tests endpoint comparisons, independent of assignment width"""
+    assert is_contained((1, 10 ** 12), (5, 5))
+    assert not is_contained((1, 5), (2, 6))
+    assert overlaps((1, 10 ** 12), (10 ** 12, 10 ** 13))
+    assert not overlaps((7, 9), (2, 6))
+
+
+def test_interval_index():
+    """Tests sweep line queries against pairwise checks"""
+    index = IntervalIndex.from_pairs(TEST_DATA)
+    elves = index.assignments
+    assert {i for i, left in enumerate(elves)
+            if any(overlaps(left, right) for j, right in enumerate(elves) if i != j)} \
+        == index.overlapping()
+    assert 8 == index.max_coverage()
+    assert all(sum(start <= section <= end for start, end in elves) == index.coverage_at(section)
+               for section in range(0, 11))
+    assert [(1, 1, 1), (3, 3, 2)] == IntervalIndex([(1, 1), (3, 3), (3, 3)]).coverage()
+    assert {1, 2} == IntervalIndex([(1, 1), (3, 5), (5, 9)]).overlapping()
+
+
 def main() -> None:
     """Main wrapper."""
     data = load_data('./input')
@@ -7,9 +7,12 @@ Solves fifth day of aoc 2022.
 
 # pylint: disable=invalid-name
 
-from typing import Final, List
+from array import array
+from typing import Final, List, Tuple
 import re
 
+import pytest
+
 
 TEST_DATA: Final = [
     "    [D]    ",
@@ -23,6 +26,8 @@ TEST_DATA: Final = [
     "move 1 from 1 to 2",
 ]
 
+NUMBERS: Final = re.compile(r'\d+')
+
 
 def load_data(filename: str):
     """Loads input file"""
@@ -30,10 +35,15 @@ def load_data(filename: str):
         return parse_data(list(map(lambda x: x.rstrip(), file.readlines())))
 
 
-def parse_cmd(cmd: str):
-    """parses a command into relvant"""
-    m = re.match(r'move\ (\d+)\ from\ (\d+)\ to\ (\d+)', cmd)
-    return tuple((int(m.group(1)), int(m.group(2)), int(m.group(3)))) if m else (None, None, None)
+def parse_commands(commands_data: List[str]) -> array:
+    """Parses all commands at once into flat (count, from, to) triples"""
+    return array('i', map(int, NUMBERS.findall('\n'.join(commands_data))))
+
+
+def triples(commands):
+    """Iterates flat command array as (count, from, to) tuples"""
+    it = iter(commands)
+    return zip(it, it, it)
 
 
 def parse_data(data: List[str]):
@@ -50,34 +60,128 @@ def parse_data(data: List[str]):
     for s in stacks_data:
         for i in range(num_stacks):
             if s[i*4:i*4+3].strip():
-                stacks[i].insert(0, s[i*4+1])
+                stacks[i].append(s[i*4+1])
+    for s in stacks:
+        s.reverse()
 
-    commands = list(map(parse_cmd, commands_data))
+    commands = parse_commands(commands_data)
 
     return stacks, commands
 
 
+class Crane:
+    """Operates on a copy of the stacks. Every move costs O(moved crates),
+    crates are taken off the source stack with an in-place del slice.
+    With snapshot_every set, the stacks are recorded as compact strings
+    every N commands, so any intermediate state can be rebuilt cheaply"""
+
+    def __init__(self, stacks, bulk: bool = False, snapshot_every: int = 0):
+        self.stacks = [list(s) for s in stacks]
+        self.bulk = bulk
+        self.snapshot_every = snapshot_every
+        self.history = array('i')
+        self.snapshots = [self.snapshot()] if snapshot_every else []
+
+    def move(self, a: int, f: int, t: int):
+        """Moves a crates from stack f to stack t (1-based like the commands)"""
+        source = self.stacks[f-1]
+        if a > len(source):
+            raise ValueError(f'cannot move {a} crates from stack {f} holding {len(source)}')
+        if a <= 0 or f == t:
+            return  # moving crates onto their own stack changes nothing
+
+        crates = source[-a:]
+        del source[-a:]
+        if not self.bulk:
+            crates.reverse()  # one at a time, so the top crate lands first
+        self.stacks[t-1].extend(crates)
+
+    def run(self, commands):
+        """Executes all commands, returns crane for chaining"""
+        if not self.snapshot_every:
+            for a, f, t in triples(commands):
+                self.move(a, f, t)
+            return self
+
+        for a, f, t in triples(commands):
+            self.move(a, f, t)
+            self.history.extend((a, f, t))
+            if len(self.history) // 3 % self.snapshot_every == 0:
+                self.snapshots.append(self.snapshot())
+        return self
+
+    def snapshot(self) -> Tuple[str, ...]:
+        """Returns stacks in compact form, one string per stack"""
+        return tuple(''.join(s) for s in self.stacks)
+
+    def state_at(self, index: int) -> List[List[str]]:
+        """Rebuilds stacks after the first index commands from the nearest
+        snapshot, replaying at most snapshot_every commands"""
+        if not self.snapshot_every:
+            raise ValueError('crane does not record snapshots')
+        if not 0 <= index <= len(self.history) // 3:
+            raise IndexError(f'command index {index} out of range')
+
+        nearest = index // self.snapshot_every
+        crane = Crane(self.snapshots[nearest], self.bulk)
+        crane.run(self.history[nearest * self.snapshot_every * 3:index * 3])
+        return crane.stacks
+
+    def tops(self) -> str:
+        """Returns top crate of every stack, blank for empty stacks"""
+        return ''.join([s[-1] if s else ' ' for s in self.stacks])
+
+
+def top_crates(stacks, commands, bulk: bool = False) -> str:
+    """Finds top crates without moving any. Only stack heights are tracked
+    forward, then every final top position is traced back through the
+    commands to the crate it originally held: O(commands * stacks)"""
+    commands = list(triples(commands))
+    heights = [len(s) for s in stacks]
+    for a, f, t in commands:
+        if a > heights[f-1]:
+            raise ValueError(f'cannot move {a} crates from stack {f} holding {heights[f-1]}')
+        heights[f-1] -= a
+        heights[t-1] += a
+
+    tops = []
+    for i, height in enumerate(heights):
+        if not height:
+            tops.append(' ')
+            continue
+
+        stack, depth = i + 1, 0  # depth counted from top of stack
+        for a, f, t in reversed(commands):
+            if f == t:
+                continue
+            if stack == t:
+                if depth < a:
+                    stack, depth = f, depth if bulk else a - 1 - depth
+                else:
+                    depth -= a
+            elif stack == f:
+                depth += a
+        tops.append(stacks[stack-1][-1-depth])
+
+    return ''.join(tops)
+
+
 def part_01(stacks, commands) -> str:
     """Crane can only move one item at  time"""
-    _ = [[stacks[t-1].append(stacks[f-1].pop()) for _ in range(a)] for a, f, t in commands]
-
-    return ''.join([s[-1] for s in stacks])
+    return Crane(stacks).run(commands).tops()
 
 
 def part_02(stacks, commands) -> str:
     """Crane can move multiple items at time"""
-    for a, f, t in commands:
-        stacks[t-1].extend(stacks[f-1][-a:])
-        stacks[f-1] = stacks[f-1][0:-a]
-
-    return ''.join([s[-1] if s else ' ' for s in stacks])
+    return Crane(stacks, bulk=True).run(commands).tops()
 
 
 def test_parse_input():
     """Test load parsing data"""
     stacks, commands = parse_data(TEST_DATA)
     assert [['Z', 'N'], ['M', 'C', 'D'], ['P']] == stacks
-    assert [(1, 2, 1), (3, 1, 3), (2, 2, 1), (1, 1, 2)] == commands
+    assert array('i', [1, 2, 1, 3, 1, 3, 2, 2, 1, 1, 1, 2]) == commands
+    assert [(1, 2, 1), (3, 1, 3), (2, 2, 1), (1, 1, 2)] == list(triples(commands))
 
 
 def test_part_01():
@@ -92,10 +196,50 @@ def test_part_02():
     assert 'MCD' == part_02(stacks, commands)
 
 
+def test_crane():
+    """Tests crane moves keep input stacks untouched"""
+    stacks, commands = parse_data(TEST_DATA)
+    crane = Crane(stacks).run(commands[:6])
+    assert [[], ['M', 'C'], ['P', 'D', 'N', 'Z']] == crane.stacks
+    assert [['Z', 'N'], ['M', 'C', 'D'], ['P']] == stacks
+
+    crane = Crane(stacks, bulk=True).run(commands[:6])
+    assert [[], ['M', 'C'], ['P', 'Z', 'N', 'D']] == crane.stacks
+    assert ' CD' == crane.tops()
+
+    same = [['A', 'B', 'C'], ['D']]
+    assert 'CD' == part_01(same, array('i', [2, 1, 1]))
+    assert 'CD' == top_crates(same, array('i', [2, 1, 1]))
+
+    with pytest.raises(ValueError):
+        part_01([['A', 'B'], ['C']], array('i', [3, 1, 2]))
+    with pytest.raises(ValueError):
+        top_crates([['A', 'B'], ['C']], array('i', [3, 1, 2]))
+
+
+def test_top_crates():
+    """Tests backwards tracing of top crates"""
+    stacks, commands = parse_data(TEST_DATA)
+    assert 'CMZ' == top_crates(stacks, commands)
+    assert 'MCD' == top_crates(stacks, commands, bulk=True)
+    assert ' CD' == top_crates(stacks, commands[:6], bulk=True)
+
+
+def test_snapshots():
+    """Tests rebuilding intermediate states from snapshots"""
+    stacks, commands = parse_data(TEST_DATA)
+    crane = Crane(stacks, snapshot_every=3).run(commands)
+    assert [('ZN', 'MCD', 'P'), ('CM', '', 'PDNZ')] == crane.snapshots
+
+    for index in range(5):
+        assert Crane(stacks).run(commands[:index * 3]).stacks == crane.state_at(index)
+
+
 def main() -> None:
     """Main wrapper."""
-    print(part_01(*load_data('./input')))
-    print(part_02(*load_data('./input')))
+    stacks, commands = load_data('./input')
+    print(part_01(stacks, commands))
+    print(part_02(stacks, commands))
 
 
 if __name__ == "__main__":
@@ -7,7 +7,12 @@ Date   : 2022-12-05
 Purpose: Solves day 06 from advent of code 2022.
 """
 
-from typing import Final
+from typing import BinaryIO, Dict, Final, Iterator
+import io
+import mmap
+import os
+
+import pytest
 
 
 TEST_DATA_PART_01: Final = [
@@ -35,11 +40,138 @@ def load_data(filename: str):
 
 
 def solve(data: str, packet_size: int) -> int:
-    """Solves both parts"""
-    return list(map(lambda x: len(set(data[x-packet_size:x])) == packet_size,
-                    range(packet_size, len(data) + 1)
-                    )
-                ).index(True) + packet_size
+    """Solves both parts. Keeps letter counts of the sliding window and the
+    number of distinct letters in it, stops at the first marker"""
+    if not data.isascii():
+        raise ValueError('datastream must be ASCII')
+
+    counts = [0] * 128
+    distinct = 0
+
+    for i, char in enumerate(data):
+        letter = ord(char)
+        if counts[letter] == 0:
+            distinct += 1
+        counts[letter] += 1
+
+        if i >= packet_size:
+            letter = ord(data[i - packet_size])
+            counts[letter] -= 1
+            if counts[letter] == 0:
+                distinct -= 1
+
+        if distinct == packet_size:
+            return i + 1
+
+    return -1
+
+
+def solve_many(data: str, packet_sizes) -> Dict[int, int]:
+    """Finds first marker of every packet size in a single pass. Tracks the
+    longest run of distinct letters ending at the current position, a marker
+    of size k is found as soon as that run reaches k"""
+    pending = sorted(set(packet_sizes))
+    markers = {size: -1 for size in pending}
+    if not data.isascii():
+        raise ValueError('datastream must be ASCII')
+
+    last_seen = [-1] * 128
+    start = 0
+
+    for i, char in enumerate(data):
+        letter = ord(char)
+        if last_seen[letter] >= start:
+            start = last_seen[letter] + 1
+        last_seen[letter] = i
+
+        while pending and i - start + 1 >= pending[0]:
+            markers[pending.pop(0)] = i + 1
+        if not pending:
+            break
+
+    return markers
+
+
+class MarkerScanner:
+    """Sliding window over a byte stream, fed chunk by chunk. Window state
+    (byte counts, distinct bytes, ring buffer of the window) is carried
+    across chunk boundaries"""
+
+    def __init__(self, packet_size: int):
+        self.packet_size = packet_size
+        self.counts = [0] * 256
+        self.distinct = 0
+        self.window = bytearray(packet_size)
+        self.offset = 0
+
+    def feed(self, chunk) -> Iterator[int]:
+        """Yields stream offsets right after every marker ending in chunk"""
+        counts, window, size = self.counts, self.window, self.packet_size
+
+        for value in chunk:
+            slot = self.offset % size
+            if self.offset >= size:
+                old = window[slot]
+                counts[old] -= 1
+                if counts[old] == 0:
+                    self.distinct -= 1
+
+            window[slot] = value
+            if counts[value] == 0:
+                self.distinct += 1
+            counts[value] += 1
+            self.offset += 1
+
+            if self.distinct == size:
+                yield self.offset
+
+
+def scan_stream(stream: BinaryIO, packet_size: int, chunk_size: int = 1 << 16) -> Iterator[int]:
+    """Yields byte offsets of all markers in a binary stream, reading it in
+    fixed size chunks into one reusable buffer"""
+    scanner = MarkerScanner(packet_size)
+    buffer = bytearray(chunk_size)
+    view = memoryview(buffer)
+
+    while True:
+        length = stream.readinto(buffer)
+        if not length:
+            break
+        yield from scanner.feed(view[:length])
+
+
+def find_marker(view, packet_size: int) -> int:
+    """Checks windows backwards using a mask with one bit per byte value. On a
+    duplicate, the next window starts right after it, skipping every window
+    that still contains both bytes"""
+    end = len(view)
+    while end and view[end - 1] in b'\r\n':
+        end -= 1
+
+    start = 0
+    while start + packet_size <= end:
+        mask = 0
+        for pos in range(start + packet_size - 1, start - 1, -1):
+            bit = 1 << view[pos]
+            if mask & bit:
+                start = pos + 1
+                break
+            mask |= bit
+        else:
+            return start + packet_size
+
+    return -1
+
+
+def solve_mmap(filename: str, packet_size: int) -> int:
+    """Solves by memory mapping the file, without copying it into a string"""
+    if os.path.getsize(filename) == 0:
+        return -1
+
+    with open(filename, 'rb') as file, \
+            mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as mapped, \
+            memoryview(mapped) as view:
+        return find_marker(view, packet_size)
 
 
 def solve_conventionally(data: str, packet_size: int) -> int:
@@ -67,12 +199,61 @@ def test_part_02():
         assert test[1] == solve(test[0], 14)
 
 
+def test_solve():
+    """Tests arbitrary window sizes against conventional solution"""
+    for test, _ in TEST_DATA_PART_01:
+        for size in range(1, 28):
+            assert solve_conventionally(test, size) == solve(test, size)
+
+
+def test_solve_any_ascii():
+    """Tests upper case letters don't alias lower case ones"""
+    assert 4 == solve('Ztab', 4)
+    assert -1 == solve('tZtZ', 3)
+    with pytest.raises(ValueError):
+        solve('abcdä', 4)
+
+
+def test_solve_many():
+    """Tests single pass detection for several packet sizes"""
+    for (test, expected_01), (_, expected_02) in zip(TEST_DATA_PART_01, TEST_DATA_PART_02):
+        markers = solve_many(test, [14, 4, 27])
+        assert {4: expected_01, 14: expected_02, 27: -1} == markers
+        assert all(solve(test, size) == solve_many(test, [size])[size] for size in range(1, 20))
+    assert {3: 3, 4: -1} == solve_many('tZat', [3, 4])
+
+
+def test_solve_mmap(tmp_path):
+    """Tests memory mapped bitmask search"""
+    for test, expected in TEST_DATA_PART_02:
+        assert expected == find_marker(test.encode(), 14)
+
+        filename = tmp_path / 'input'
+        filename.write_bytes(test.encode() + b'\n')
+        assert expected == solve_mmap(str(filename), 14)
+        assert solve(test, 4) == solve_mmap(str(filename), 4)
+        assert -1 == solve_mmap(str(filename), 27)
+
+    for test in ('Azab', 'AzAb', 'aZzAbB'):
+        assert solve(test, 4) == find_marker(test.encode(), 4)
+
+
+def test_scan_stream():
+    """Tests chunked scanning across chunk boundaries"""
+    for test, expected in TEST_DATA_PART_02:
+        stream = io.BytesIO(test.encode())
+        markers = list(scan_stream(stream, 14, chunk_size=3))
+        assert expected == markers[0]
+        assert markers == [i for i in range(14, len(test) + 1)
+                           if len(set(test[i - 14:i])) == 14]
+
+
 # --------------------------------------------------
 def main() -> None:
     """Main wrapper."""
-    data = load_data('./input')
-    print(solve(data, 4))
-    print(solve(data, 14))
+    markers = solve_many(load_data('./input'), [4, 14])
+    print(markers[4])
+    print(markers[14])
 
 
 if __name__ == '__main__':
@@ -11,6 +11,13 @@ from typing import Final
 from functools import reduce
 import operator
 
+import pytest
+
+try:
+    import numpy as np
+except ImportError:  # numpy backend is optional
+    np = None
+
 
 TEST_DATA: Final = """30373
 25512
@@ -74,6 +81,39 @@ def scenic(patch, row, col) -> int:
                   ])
 
 
+def view_distances(line) -> list:
+    """Calculates viewing distance towards the start of the line for every tree,
+    using a monotonic stack of trees not yet blocked by a taller one"""
+    distances = [0] * len(line)
+    stack = []
+    for i, height in enumerate(line):
+        while stack and line[stack[-1]] < height:
+            stack.pop()
+        distances[i] = i - stack[-1] if stack else i
+        stack.append(i)
+    return distances
+
+
+def scenic_scores(patch) -> list:
+    """Calculates the full matrix of scenic values in linear time"""
+    rows, cols = len(patch), len(patch[0])
+    scores = [[1] * cols for _ in range(rows)]
+
+    for i, line in enumerate(patch):
+        left = view_distances(line)
+        right = view_distances(line[::-1])[::-1]
+        for j in range(cols):
+            scores[i][j] *= left[j] * right[j]
+
+    for j, line in enumerate(zip(*patch)):
+        top = view_distances(line)
+        bottom = view_distances(line[::-1])[::-1]
+        for i in range(rows):
+            scores[i][j] *= top[i] * bottom[i]
+
+    return scores
+
+
 def part_01(patch, rows, cols) -> int:
     """Solves part 01"""
     transposed = list(map(list, zip(*patch)))
@@ -87,8 +127,81 @@ def part_01(patch, rows, cols) -> int:
 
 def part_02(patch, rows, cols) -> int:
     """solves part 02"""
+    scores = scenic_scores(patch)
+
+    return max((scores[i][j] for j in range(cols) for i in range(rows)))
+
+
+# --------------------------------------------------
+# optional numpy backend
+# --------------------------------------------------
+def require_numpy():
+    """Fails early if the optional numpy backend is not available"""
+    if np is None:
+        raise ImportError('numpy backend requires numpy')
+
+
+def grid_from_bytes(raw: bytes):
+    """Converts raw input bytes into a uint8 height matrix without per-tree objects"""
+    require_numpy()
+    raw = raw.replace(b'\r', b'').rstrip() + b'\n'
+    cols = raw.index(b'\n')
+    grid = np.frombuffer(raw, dtype=np.uint8).reshape(-1, cols + 1)[:, :cols]
+    return grid - ord('0')
+
+
+def load_grid(filename: str):
+    """Loads input straight from file bytes into a numpy height matrix"""
+    with open(filename, 'rb') as file:
+        return grid_from_bytes(file.read())
 
-    return max((scenic(patch, i, j) for j in range(cols) for i in range(rows)))
+
+def _visible_from_left(grid):
+    """Mask of trees taller than every tree left of them"""
+    tallest = np.full(grid.shape, -1, dtype=np.int16)
+    tallest[:, 1:] = np.maximum.accumulate(grid, axis=1)[:, :-1]
+    return grid > tallest
+
+
+def _view_left(grid):
+    """Viewing distance to the left, one maximum.accumulate per tree height"""
+    pos = np.arange(grid.shape[1])
+    distances = np.zeros(grid.shape, dtype=np.int64)
+    for height in range(10):
+        blocker = np.zeros(grid.shape, dtype=np.int64)
+        blocker[:, 1:] = np.maximum.accumulate(np.where(grid >= height, pos, 0),
+                                               axis=1)[:, :-1]
+        mask = grid == height
+        distances[mask] = (pos - blocker)[mask]
+    return distances
+
+
+def visibility_mask(grid):
+    """Mask of trees visible from outside the grid"""
+    require_numpy()
+    return (_visible_from_left(grid)
+            | _visible_from_left(grid[:, ::-1])[:, ::-1]
+            | _visible_from_left(grid.T).T
+            | _visible_from_left(grid.T[:, ::-1])[:, ::-1].T)
+
+
+def scenic_matrix(grid):
+    """Matrix of scenic values for every tree"""
+    require_numpy()
+    return (_view_left(grid)
+            * _view_left(grid[:, ::-1])[:, ::-1]
+            * _view_left(grid.T).T
+            * _view_left(grid.T[:, ::-1])[:, ::-1].T)
+
+
+def part_01_np(grid) -> int:
+    """Solves part 01 using the numpy backend"""
+    return int(visibility_mask(grid).sum())
+
+
+def part_02_np(grid) -> int:
+    """Solves part 02 using the numpy backend"""
+    return int(scenic_matrix(grid).max())
 
 
 # --------------------------------------------------
@@ -106,6 +219,31 @@ def test_part_02():
     assert 8 == scenic(data, 3, 2)
 
 
+def test_scenic_scores():
+    """Tests monotonic stack scenic matrix against the naive walk"""
+    rows, cols, data = parse_data(TEST_DATA)
+    scores = scenic_scores(data)
+
+    assert [0, 1, 2, 3, 1] == view_distances('30373')
+    assert all(scenic(data, i, j) == scores[i][j] for j in range(cols) for i in range(rows))
+    assert 8 == part_02(data, rows, cols)
+
+
+def test_numpy_backend(tmp_path):
+    """Tests numpy backend against list based solution"""
+    pytest.importorskip('numpy')
+    _, _, data = parse_data(TEST_DATA)
+    grid = grid_from_bytes(TEST_DATA.encode())
+
+    assert (grid == grid_from_bytes(TEST_DATA.replace('\n', '\r\n').encode() + b'\r\n')).all()
+    assert 21 == part_01_np(grid)
+    filename = tmp_path / 'input'
+    filename.write_bytes(TEST_DATA.encode() + b'\n')
+    assert (grid == load_grid(str(filename))).all()
+    assert 8 == part_02_np(grid)
+    assert scenic_scores(data) == scenic_matrix(grid).tolist()
+
+
 # --------------------------------------------------
 def main() -> None:
     """Main wrapper."""
@@ -7,7 +7,10 @@ Date   : 2022-12-09
 Purpose: Solves day 09 from advent of code 2022. Python 3.9+
 """
 
-from typing import Final
+from array import array
+from typing import Final, Union
+
+import pytest
 
 
 TEST_DATA_01: Final = """R 4
@@ -29,14 +32,98 @@ L 25
 U 20"""
 
 
-MOVEMENTS: Final[dict[tuple[int, int], tuple[int,int]]] = {
-    (-2, 1): (-1, 1), (-2, 0): (-1, 0), (-2, -1): (-1, -1),  # Left
-    (-1, 2): (-1, 1), (0, 2): (0, 1), (1, 2): (1, 1),  # Up
-    (2, 1): (1, 1), (2, 0): (1, 0), (2, -1): (1, -1),  # Right
-    (-1, -2): (-1, -1), (0, -2): (0, -1), (1, -2): (1, -1),  # Down
-    (2, 2): (1, 1), (2, -2): (1, -1), (-2, -2): (-1, -1), (-2, 2): (-1, 1)  # 2x2 cases
+DIRECTIONS: Final[dict[str, tuple[int, int]]] = {
+    'R': (1, 0), 'L': (-1, 0), 'U': (0, 1), 'D': (0, -1)
 }
 
+POPCOUNT: Final = bytes(bin(i).count('1') for i in range(256))
+
+
+class VisitedMap:
+    """Packed bitmap of visited cells over the bounding box of the head path"""
+
+    def __init__(self, box: tuple[int, int, int, int]):
+        self.min_x, self.min_y, self.width, height = box
+        self.bits = bytearray((self.width * height + 7) // 8)
+
+    def _index(self, x: int, y: int) -> int:
+        return (y - self.min_y) * self.width + x - self.min_x
+
+    def add(self, x: int, y: int):
+        """Marks cell as visited"""
+        idx = self._index(x, y)
+        self.bits[idx >> 3] |= 1 << (idx & 7)
+
+    def add_run(self, x: int, y: int, step_x: int, step_y: int, count: int):
+        """Marks count cells in a straight line, starting one step after (x, y).
+        Horizontal runs are contiguous bits and set in bulk"""
+        if step_y or count <= 0:
+            for _ in range(count):
+                x += step_x
+                y += step_y
+                self.add(x, y)
+            return
+
+        first = self._index(x + step_x, y)
+        last = self._index(x + step_x * count, y)
+        self._set_bits(min(first, last), max(first, last) + 1)
+
+    def _set_bits(self, start: int, stop: int):
+        """Sets bits start..stop-1, whole bytes with one slice assignment"""
+        while start < stop and start & 7:
+            self.bits[start >> 3] |= 1 << (start & 7)
+            start += 1
+        while start < stop and stop & 7:
+            stop -= 1
+            self.bits[stop >> 3] |= 1 << (stop & 7)
+        if start < stop:
+            self.bits[start >> 3:stop >> 3] = b'\xff' * ((stop - start) >> 3)
+
+    def __contains__(self, cell: tuple[int, int]) -> bool:
+        idx = self._index(*cell)
+        return bool(self.bits[idx >> 3] & (1 << (idx & 7)))
+
+    def __len__(self) -> int:
+        return sum(self.bits.translate(POPCOUNT))
+
+
+class VisitedSet:
+    """Visited cells as a set of 64 bit encoded ints, for sparse paths whose
+    bounding box is too large for a bitmap"""
+    OFFSET: Final = 1 << 31
+
+    def __init__(self):
+        self.cells = set()
+
+    def _encode(self, x: int, y: int) -> int:
+        return (x + self.OFFSET) << 32 | (y + self.OFFSET)
+
+    def add(self, x: int, y: int):
+        """Marks cell as visited"""
+        self.cells.add(self._encode(x, y))
+
+    def add_run(self, x: int, y: int, step_x: int, step_y: int, count: int):
+        """Marks count cells in a straight line, starting one step after (x, y)"""
+        if count <= 0:
+            return
+        step = (step_x << 32) + step_y
+        first = self._encode(x + step_x, y + step_y)
+        self.cells.update(range(first, first + step * count, step))
+
+    def __contains__(self, cell: tuple[int, int]) -> bool:
+        return self._encode(*cell) in self.cells
+
+    def __len__(self) -> int:
+        return len(self.cells)
+
+
+def visited_cells(box: tuple[int, int, int, int], path_length: int):
+    """Picks bitmap or encoded set, whichever needs less memory. A set entry
+    costs roughly 512 bitmap cells"""
+    if box[2] * box[3] > 512 * (path_length + 1):
+        return VisitedSet()
+    return VisitedMap(box)
+
 
 # --------------------------------------------------
 def load_data(filename: str):
@@ -50,66 +137,84 @@ def parse_data(data):
     return [(cmd[0], int(cmd[2:])) for cmd in data.split('\n')]
 
 
-def move_t(pos_h: tuple[int, int], pos_t: tuple[int, int]):
-    """Return modification to deal to pos_t"""
-    if abs(pos_h[0] - pos_t[0]) < 2 and abs(pos_h[1] - pos_t[1]) < 2:
-        return (0, 0)
-
-    return MOVEMENTS[(pos_h[0] - pos_t[0], pos_h[1] - pos_t[1])]
-
+def bounding_box(data: list[tuple[str, int]]) -> tuple[int, int, int, int]:
+    """Returns (min_x, min_y, width, height) of the head path. Followers never
+    leave it, as they only ever step towards their predecessor"""
+    pos_x = pos_y = min_x = min_y = max_x = max_y = 0
+    for cmd, num in data:
+        step_x, step_y = DIRECTIONS[cmd]
+        pos_x += step_x * num
+        pos_y += step_y * num
+        min_x, max_x = min(min_x, pos_x), max(max_x, pos_x)
+        min_y, max_y = min(min_y, pos_y), max(max_y, pos_y)
+
+    return min_x, min_y, max_x - min_x + 1, max_y - min_y + 1
+
+
+def is_straight(xs: array, ys: array, step_x: int, step_y: int) -> bool:
+    """Tests if every knot trails its predecessor by exactly one step"""
+    return all(xs[i] == xs[i - 1] - step_x and ys[i] == ys[i - 1] - step_y
+               for i in range(1, len(xs)))
+
+
+def simulate(data: list[tuple[str, int]], knots: int,
+             tracked: tuple[int, ...] = (-1,)) -> dict[int, Union[VisitedMap, VisitedSet]]:
+    """Moves a rope with any number of knots, stored in flat coordinate arrays.
+    Followers step by the sign of the distance to their predecessor. Once the
+    whole rope trails the head in a straight line, the rest of the segment is
+    applied at once. Visited cells are only recorded for the tracked knot
+    indices (default: last knot)"""
+    box = bounding_box(data)
+    xs = array('q', [0]) * knots
+    ys = array('q', [0]) * knots
+    if any(not -knots <= i < knots for i in tracked):
+        raise IndexError(f'tracked knots {tracked} out of range for {knots} knots')
+    path_length = sum(num for _, num in data)
+    visited = {i % knots: visited_cells(box, path_length) for i in tracked}
+    for cells in visited.values():
+        cells.add(0, 0)
+    head = visited.get(0)
 
-def move_h(pos_h: tuple[int, int], direction: str) -> tuple[int, int]:
-    """Moves 'head'. In quotes because tail elements can operate as 'head', too
-    (relativly to their 'followers')"""
-    if direction == 'R':
-        return (pos_h[0] + 1, pos_h[1])
-    if direction == 'L':
-        return (pos_h[0] - 1, pos_h[1])
-    if direction == 'U':
-        return (pos_h[0], pos_h[1] + 1)
-    # D
-    return (pos_h[0], pos_h[1] - 1)
+    for cmd, num in data:
+        step_x, step_y = DIRECTIONS[cmd]
+        for done in range(1, num + 1):
+            xs[0] += step_x
+            ys[0] += step_y
+            if head is not None:
+                head.add(xs[0], ys[0])
+
+            for i in range(1, knots):
+                d_x = xs[i - 1] - xs[i]
+                d_y = ys[i - 1] - ys[i]
+                if -1 <= d_x <= 1 and -1 <= d_y <= 1:
+                    break  # knots that follow don't need to be moved
+
+                xs[i] += (d_x > 0) - (d_x < 0)
+                ys[i] += (d_y > 0) - (d_y < 0)
+                if i in visited:
+                    visited[i].add(xs[i], ys[i])
+            else:
+                # whole rope moved, check if it can be moved as one piece
+                if done < num and is_straight(xs, ys, step_x, step_y):
+                    remaining = num - done
+                    for i, cells in visited.items():
+                        cells.add_run(xs[i], ys[i], step_x, step_y, remaining)
+                    for i in range(knots):
+                        xs[i] += step_x * remaining
+                        ys[i] += step_y * remaining
+                    break
+
+    return visited
 
 
 def part_01(data: list[tuple[str, int]]) -> int:
     """Solves part 01"""
-    pos_h = (0, 0)
-    pos_t = (0, 0)
-
-    visited_t = set()
-    visited_t.add((0, 0))
-    for cmd, num in data:
-        for _ in range(num):
-            pos_h = move_h(pos_h, cmd)
-            movement = move_t(pos_h, pos_t)
-            if movement != (0, 0):
-                pos_t = (pos_t[0] + movement[0], pos_t[1] + movement[1])
-                visited_t.add(pos_t)
-
-    return len(visited_t)
+    return len(simulate(data, 2)[1])
 
 
 def part_02(data) -> int:
     """solves part 02"""
-    pos_h = (0, 0)
-
-    visited = [set() for _ in range(9)]
-    pos_t = [(int(0), int(0)) for _ in range(9)]
-    for i in range(9):
-        visited[i].add(pos_t[i])
-
-    for cmd, num in data:
-        for _ in range(num):
-            pos_h = move_h(pos_h, cmd)
-            for i, pos in enumerate(pos_t):
-                movement = move_t(pos_h if i == 0 else pos_t[i-1], pos)
-                if movement == (0, 0):
-                    break  # inner for loop, knots that follow don't need to be moved
-
-                pos_t[i] = (pos[0] + movement[0], pos[1] + movement[1])
-                visited[i].add(pos_t[i])
-
-    return len(visited[-1])
+    return len(simulate(data, 10)[9])
 
 
 # --------------------------------------------------
@@ -125,6 +230,44 @@ def test_part_02():
     assert 36 == part_02(data)
 
 
+def test_simulate():
+    """Tests rope engine with several tracked knots"""
+    visited = simulate(parse_data(TEST_DATA_01), 10, (0, 1, 9))
+    assert 13 == len(visited[1])
+    assert 1 == len(visited[9])
+    assert 36 == len(simulate(parse_data(TEST_DATA_02), 10)[9])
+
+
+def test_simulate_tracked_range():
+    """Tests tracked knot indices are validated"""
+    with pytest.raises(IndexError):
+        simulate(parse_data(TEST_DATA_01), 10, (10,))
+
+
+def test_visited_map():
+    """Tests bitmap bookkeeping and straight segment batching"""
+    data = parse_data(TEST_DATA_02)
+    assert (-11, -5, 26, 21) == bounding_box(data)
+
+    visited = simulate([('R', 10), ('U', 3)], 2, (0, 1))
+    assert 14 == len(visited[0])
+    assert 12 == len(visited[1])
+    assert (9, 0) in visited[1] and (10, 2) in visited[1]
+    assert (10, 0) not in visited[1]
+    assert isinstance(visited[1], VisitedMap)
+
+    sparse = [('R', 100000), ('U', 100000), ('L', 3)]
+    visited = simulate(sparse, 2, (0, 1))
+    assert isinstance(visited[1], VisitedSet)
+    assert 200004 == len(visited[0])
+    assert 200001 == len(visited[1])
+    assert (100000, 99999) in visited[1] and (99998, 100000) in visited[1]
+
+    cells = VisitedMap((0, 0, 30, 2))
+    cells.add_run(25, 1, -1, 0, 22)
+    assert 22 == len(cells) and (3, 1) in cells and (2, 1) not in cells
+
+
 # --------------------------------------------------
 def main() -> None:
     """Main wrapper."""
@@ -7,9 +7,32 @@ Date   : 2022-12-11
 Purpose: Solves day 10 from advent of code 2022.
 """
 
-from typing import Final
-from functools import reduce
+import io
 import operator
+from array import array
+from bisect import bisect_right
+from typing import Callable, Final, Iterator, NamedTuple
+
+import pytest
+
+
+class Instruction(NamedTuple):
+    """Cycle cost and register update of an instruction"""
+    cycles: int
+    execute: Callable[[int, int], int]
+
+
+class Program(NamedTuple):
+    """Decoded program: mnemonic table plus compact opcode and operand arrays"""
+    names: tuple[str, ...]
+    opcodes: array
+    operands: array
+
+
+INSTRUCTION_SET: Final[dict[str, Instruction]] = {
+    'noop': Instruction(1, lambda x, _: x),
+    'addx': Instruction(2, operator.add)
+}
 
 
 TEST_DATA: Final = """addx 15
@@ -175,39 +198,149 @@ def load_data(filename: str):
         return file.read().rstrip()
 
 
-def parse_data(data):
-    """Parsed commands. addx commands are treated like noop + real add"""
-    cmds = []
+def compile_program(data, instruction_set=None) -> Program:
+    """Decodes source once into opcode and operand arrays"""
+    instruction_set = INSTRUCTION_SET if instruction_set is None else instruction_set
+    names = tuple(instruction_set)
+    lookup = {name: code for code, name in enumerate(names)}
+    opcodes = array('B')
+    operands = array('q')
+
     for line in data.split('\n'):
-        cmds.append(0)
-        if line != 'noop':
-            cmds.append(int(line[5:]))
+        name, _, operand = line.partition(' ')
+        opcodes.append(lookup[name])
+        operands.append(int(operand) if operand else 0)
 
-    return cmds
+    return Program(names, opcodes, operands)
 
 
-def part_01(data) -> int:
-    """Solves part 01"""
-    strengths = [1]
+def parse_data(data):
+    """Parses commands into a compiled program"""
+    return compile_program(data)
 
-    for cmd in data:
-        strengths.append(strengths[-1] + cmd)
 
-    return reduce(operator.add, (map(lambda i: i * strengths[i-1], [20, 60, 100, 140, 180, 220])))
+def execute(program: Program, instruction_set=None, x: int = 1) -> Iterator[tuple[int, int]]:
+    """Decodes and executes program, yields (cycles, x) per instruction with
+    the cycle cost of the instruction and register X after it"""
+    instruction_set = INSTRUCTION_SET if instruction_set is None else instruction_set
+    table = [instruction_set[name] for name in program.names]
 
+    for opcode, operand in zip(program.opcodes, program.operands):
+        cycles, execute_op = table[opcode]
+        x = execute_op(x, operand)
+        yield cycles, x
 
-def part_02(data) -> str:
-    """solves part 02"""
-    sprite = [1]
 
-    for cmd in data:
-        sprite.append(sprite[-1] + cmd)
+class Cpu:
+    """Emulates the handheld's CPU, hooks are called as hook(cycle, x) during
+    every cycle. No register history is kept"""
+
+    def __init__(self, instruction_set=None):
+        self.instruction_set = INSTRUCTION_SET if instruction_set is None else instruction_set
+        self.hooks = []
+
+    def register(self, hook):
+        """Registers a cycle hook, returns it for convenience"""
+        self.hooks.append(hook)
+        return hook
+
+    def run(self, program: Program, x: int = 1) -> int:
+        """Runs program, returns final value of register X"""
+        hooks = self.hooks
+        cycle = 0
+
+        for cycles, new_x in execute(program, self.instruction_set, x):
+            for _ in range(cycles):
+                cycle += 1
+                for hook in hooks:
+                    hook(cycle, x)
+            x = new_x
+
+        return x
+
+
+class SignalProbe:
+    """Cycle hook summing up signal strengths of selected cycles"""
+
+    def __init__(self, cycles):
+        self.cycles = frozenset(cycles)
+        self.total = 0
+
+    def __call__(self, cycle: int, x: int):
+        if cycle in self.cycles:
+            self.total += cycle * x
+
+
+class Crt:
+    """Cycle hook drawing pixels into a preallocated framebuffer. Completed
+    frames are written to stream, if given"""
+    LIT: Final = ord('#')
+    DARK: Final = ord('.')
+
+    def __init__(self, width: int = 40, height: int = 6, stream=None):
+        self.width = width
+        self.height = height
+        self.stream = stream
+        self.frames = 0
+        self.framebuffer = bytearray([self.DARK]) * (width * height)
 
-    crt = ["#" if sprite[i]-1 <= i % 40 <= sprite[i]+1 else "." for i in range(240)]
+    def __call__(self, cycle: int, x: int):
+        pos = (cycle - 1) % len(self.framebuffer)
+        self.framebuffer[pos] = self.LIT if x - 1 <= pos % self.width <= x + 1 else self.DARK
+        if pos == len(self.framebuffer) - 1:
+            self.frames += 1
+            if self.stream is not None:
+                self.stream.write(self.frame() + b'\n\n')
 
-    return '\n'.join([
-        reduce(lambda a, b: a+str(b), crt[i*40:(i+1)*40]) for i in range(6)
-    ])
+    def frame(self) -> bytes:
+        """Returns framebuffer content as rows"""
+        return b'\n'.join(self.framebuffer[i:i + self.width]
+                          for i in range(0, len(self.framebuffer), self.width))
+
+    def render(self) -> str:
+        """Returns screen content"""
+        return self.frame().decode('ascii')
+
+
+class Timeline:
+    """Register X as change points: starts[i] is the first cycle during which
+    X has values[i]. Memory is bound by the number of instructions"""
+
+    def __init__(self, program: Program, instruction_set=None, x: int = 1):
+        self.starts = array('q', [1])
+        self.values = array('q', [x])
+        cycle = 1
+
+        for cycles, new_x in execute(program, instruction_set, x):
+            cycle += cycles
+            if new_x != x:
+                self.starts.append(cycle)
+                self.values.append(new_x)
+                x = new_x
+
+    def value_at(self, cycle: int) -> int:
+        """Value of register X during given cycle"""
+        if cycle < 1:
+            raise ValueError(f'cycles start at 1, got {cycle}')
+        return self.values[bisect_right(self.starts, cycle) - 1]
+
+    def signal_strength(self, cycles) -> int:
+        """Sum of signal strengths during given cycles"""
+        return sum(cycle * self.value_at(cycle) for cycle in cycles)
+
+
+def part_01(data) -> int:
+    """Solves part 01"""
+    return Timeline(data).signal_strength([20, 60, 100, 140, 180, 220])
+
+
+def part_02(data) -> str:
+    """solves part 02"""
+    cpu = Cpu()
+    crt = cpu.register(Crt())
+    cpu.run(data)
+
+    return crt.render()
 
 
 # --------------------------------------------------
@@ -223,6 +356,51 @@ def test_part_02():
     assert TEST_DATA_02 == part_02(data)
 
 
+def test_cpu():
+    """Tests emulator with a custom instruction"""
+    instruction_set = dict(INSTRUCTION_SET, mulx=Instruction(3, operator.mul))
+    program = compile_program('noop\naddx 3\nmulx -5', instruction_set)
+    assert array('B', [0, 1, 2]) == program.opcodes
+
+    cpu = Cpu(instruction_set)
+    samples = []
+    cpu.register(lambda cycle, x: samples.append((cycle, x)))
+    assert -20 == cpu.run(program)
+    assert [(1, 1), (2, 1), (3, 1), (4, 4), (5, 4), (6, 4)] == samples
+
+
+def test_timeline():
+    """Tests register lookups against the emulator"""
+    program = parse_data(TEST_DATA)
+    timeline = Timeline(program)
+    cpu = Cpu()
+    probe = cpu.register(SignalProbe(range(1, 241)))
+    samples = []
+    cpu.register(lambda cycle, x: samples.append((cycle, x)))
+    cpu.run(program)
+
+    assert all(x == timeline.value_at(cycle) for cycle, x in samples)
+    assert 21 == timeline.value_at(20)
+    assert probe.total == timeline.signal_strength(range(1, 241))
+    assert len(timeline.starts) < len(program.opcodes)
+
+    timeline = Timeline(compile_program('addx 3'))
+    assert [1, 1, 4] == [timeline.value_at(cycle) for cycle in (1, 2, 3)]
+    with pytest.raises(ValueError):
+        timeline.value_at(0)
+
+
+def test_crt():
+    """Tests screen geometry and frame streaming"""
+    stream = io.BytesIO()
+    cpu = Cpu()
+    crt = cpu.register(Crt(4, 2, stream))
+    cpu.run(compile_program('\n'.join(['noop', 'addx 2'] + ['noop'] * 13)))
+
+    assert 2 == crt.frames
+    assert b'####\n..##\n\n..##\n..##\n\n' == stream.getvalue()
+
+
 # --------------------------------------------------
 def main() -> None:
     """Main wrapper."""